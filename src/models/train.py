@@ -129,8 +129,11 @@ class CryptoVolatilityTrainer:
             logger.info("Continuing with local MLflow tracking")
     
     def load_processed_data(self, file_path: str) -> pd.DataFrame:
-        """Load processed dataset"""
-        df = pd.read_csv(file_path)
+        """Load processed dataset (Parquet or CSV)"""
+        if str(file_path).endswith('.parquet'):
+            df = pd.read_parquet(file_path, engine='pyarrow')
+        else:
+            df = pd.read_csv(file_path)
         logger.info(f"Loaded {len(df)} processed records")
         logger.info(f"Columns: {df.columns.tolist()}")
         return df
@@ -151,8 +154,11 @@ class CryptoVolatilityTrainer:
         
         self.feature_names = feature_cols
         
-        X = df[feature_cols].values
-        y = df['target_volatility_norm'].values  # Use normalized target
+        # One materialization of the feature block, directly at float32
+        # (half the residency of the default float64 .values copy); the
+        # per-split slices below are views into it, not copies
+        X = df[feature_cols].to_numpy(dtype=np.float32)
+        y = df['target_volatility_norm'].to_numpy()  # Use normalized target
         
         # Time-series split: train -> validation -> test
         n = len(X)
@@ -180,16 +186,45 @@ class CryptoVolatilityTrainer:
         X_val: np.ndarray, 
         X_test: np.ndarray
     ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, StandardScaler]:
-        """Scale features using StandardScaler"""
+        """Scale features using training mean/std (StandardScaler-compatible)"""
+        # Fit with two NumPy reductions instead of sklearn's fit
+        # machinery, then apply as (X - mu) * (1/sd) so the N*F
+        # divisions become multiplications. The statistics are loaded
+        # into a StandardScaler so the joblib artifact consumed by the
+        # serving side is unchanged.
+        mu = X_train.mean(axis=0, dtype=np.float64)
+        var = X_train.var(axis=0, dtype=np.float64)
+        sd = np.sqrt(var)
+        sd[sd == 0.0] = 1.0  # constant columns pass through, as in StandardScaler
+        inv_sd = 1.0 / sd
+
         scaler = StandardScaler()
-        
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_val_scaled = scaler.transform(X_val)
-        X_test_scaled = scaler.transform(X_test)
-        
+        scaler.mean_ = mu
+        scaler.var_ = var
+        scaler.scale_ = sd
+        scaler.n_features_in_ = X_train.shape[1]
+        scaler.n_samples_seen_ = X_train.shape[0]
+
+        # Apply in float32, in place: one half-width copy per split
+        # instead of a float64 result alongside the live original.
+        # XGBoost hist consumes float32 natively, so nothing upcasts
+        # downstream.
+        mu32 = mu.astype(np.float32)
+        inv_sd32 = inv_sd.astype(np.float32)
+
+        def _apply(X: np.ndarray) -> np.ndarray:
+            X = X.astype(np.float32)
+            np.subtract(X, mu32, out=X)
+            np.multiply(X, inv_sd32, out=X)
+            return X
+
+        X_train_scaled = _apply(X_train)
+        X_val_scaled = _apply(X_val)
+        X_test_scaled = _apply(X_test)
+
         self.scaler = scaler
-        
-        logger.info("Features scaled using StandardScaler")
+
+        logger.info("Features scaled using StandardScaler statistics")
         return X_train_scaled, X_val_scaled, X_test_scaled, scaler
     
     def train_xgboost(
@@ -223,7 +258,13 @@ class CryptoVolatilityTrainer:
                 'reg_alpha': 0.1,
                 'reg_lambda': 1.0,
                 'random_state': 42,
-                'n_jobs': -1
+                'n_jobs': -1,
+                # Histogram tree method with 128 bins: smaller split arrays
+                # and working set at negligible accuracy cost
+                'tree_method': 'hist',
+                'max_bin': 128,
+                # Set XGB_DEVICE=cuda to offload histogram builds to a GPU
+                'device': os.getenv('XGB_DEVICE', 'cpu')
             }
         
         logger.info("Training XGBoost model...")
@@ -405,15 +446,16 @@ def main():
     """Main execution function"""
     from pathlib import Path
     
-    # Find latest processed data file
+    # Find latest processed data file (Parquet preferred, CSV legacy)
     processed_dir = Path('data/processed')
-    csv_files = sorted(processed_dir.glob('crypto_processed_*.csv'))
-    
-    if not csv_files:
+    data_files = (sorted(processed_dir.glob('crypto_processed_*.parquet')) or
+                  sorted(processed_dir.glob('crypto_processed_*.csv')))
+
+    if not data_files:
         logger.error("No processed data files found!")
         return None
-    
-    latest_file = csv_files[-1]
+
+    latest_file = data_files[-1]
     logger.info(f"Training with file: {latest_file}")
     
     # Define hyperparameters
@@ -429,9 +471,11 @@ def main():
         'reg_alpha': 0.1,
         'reg_lambda': 1.0,
         'random_state': 42,
-        'n_jobs': -1
+        'n_jobs': -1,
+        'tree_method': 'hist',
+        'max_bin': 128
     }
-    
+
     # Train model
     trainer = CryptoVolatilityTrainer()
     results = trainer.train_and_log(
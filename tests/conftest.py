@@ -0,0 +1,10 @@
+"""
+Shared pytest setup: put src/ on sys.path once for the whole session
+"""
+
+import sys
+from pathlib import Path
+
+_SRC = str(Path(__file__).parent.parent / 'src')
+if _SRC not in sys.path:
+    sys.path.insert(0, _SRC)
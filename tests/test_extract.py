@@ -4,14 +4,19 @@ Tests CryptoCompare API extractor (free, no key required)
 """
 
 import pytest
+import json
 from unittest.mock import Mock, patch, MagicMock
 import pandas as pd
 from pathlib import Path
 import os
 import sys
 
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+# Add src to path (idempotent - conftest.py normally does this first,
+# the guard keeps direct `python tests/test_extract.py` runs working
+# without stacking duplicate entries)
+_src = str(Path(__file__).parent.parent / 'src')
+if _src not in sys.path:
+    sys.path.insert(0, _src)
 
 from data.extract import CryptoCompareExtractor
 
@@ -19,9 +24,9 @@ from data.extract import CryptoCompareExtractor
 class TestCryptoCompareExtractor:
     """Test cases for CryptoCompareExtractor"""
     
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def extractor(self):
-        """Create extractor instance"""
+        """Create extractor instance (shared across the module)"""
         return CryptoCompareExtractor()
     
     @pytest.fixture
@@ -70,12 +75,14 @@ class TestCryptoCompareExtractor:
         # CryptoCompare doesn't need API key
         assert hasattr(extractor, 'base_url')
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_fetch_current_price_success(self, mock_get, extractor, mock_price_response):
         """Test successful current price fetch"""
         mock_response = Mock()
         mock_response.json.return_value = mock_price_response
+        mock_response.content = json.dumps(mock_price_response).encode()
         mock_response.status_code = 200
+        mock_response.headers = {}
         mock_response.raise_for_status = Mock()
         mock_get.return_value = mock_response
         
@@ -88,7 +95,7 @@ class TestCryptoCompareExtractor:
         assert result['symbol'] == 'BTC'
         mock_get.assert_called_once()
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_fetch_current_price_failure(self, mock_get, extractor):
         """Test failed current price fetch"""
         mock_get.side_effect = Exception("API Error")
@@ -97,12 +104,14 @@ class TestCryptoCompareExtractor:
         
         assert result is None
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_fetch_historical_data_success(self, mock_get, extractor, mock_historical_response):
         """Test successful historical data fetch"""
         mock_response = Mock()
         mock_response.json.return_value = mock_historical_response
+        mock_response.content = json.dumps(mock_historical_response).encode()
         mock_response.status_code = 200
+        mock_response.headers = {}
         mock_response.raise_for_status = Mock()
         mock_get.return_value = mock_response
         
@@ -118,12 +127,15 @@ class TestCryptoCompareExtractor:
         assert 'volume' in result.columns
         assert 'volume_usd' in result.columns
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_fetch_historical_data_failure(self, mock_get, extractor):
         """Test failed historical data fetch"""
+        error_response = {'Response': 'Error', 'Message': 'API Error'}
         mock_response = Mock()
-        mock_response.json.return_value = {'Response': 'Error', 'Message': 'API Error'}
+        mock_response.json.return_value = error_response
+        mock_response.content = json.dumps(error_response).encode()
         mock_response.status_code = 200
+        mock_response.headers = {}
         mock_response.raise_for_status = Mock()
         mock_get.return_value = mock_response
         
@@ -145,14 +157,19 @@ class TestCryptoCompareExtractor:
         # Setup mocks
         mock_current.return_value = {'price_usd': 87696.36, 'symbol': 'BTC'}
         
-        # Create DataFrame from mock data
-        df = pd.DataFrame(mock_historical_response['Data']['Data'])
-        df['timestamp'] = pd.to_datetime(df['time'], unit='s')
-        df = df.rename(columns={
-            'volumefrom': 'volume',
-            'volumeto': 'volume_usd'
+        # Create DataFrame from mock data - column-wise with final
+        # names, matching how the extractor builds its frame (no
+        # list-of-dicts constructor, rename or reselect passes)
+        candles = mock_historical_response['Data']['Data']
+        df = pd.DataFrame({
+            'timestamp': pd.to_datetime([c['time'] for c in candles], unit='s'),
+            'open': [c['open'] for c in candles],
+            'high': [c['high'] for c in candles],
+            'low': [c['low'] for c in candles],
+            'close': [c['close'] for c in candles],
+            'volume': [c['volumefrom'] for c in candles],
+            'volume_usd': [c['volumeto'] for c in candles],
         })
-        df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume', 'volume_usd']]
         mock_historical.return_value = df
         
         # Create temp directory for output